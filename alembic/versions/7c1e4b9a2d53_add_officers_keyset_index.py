@@ -0,0 +1,39 @@
+"""add_officers_keyset_index
+
+Revision ID: 7c1e4b9a2d53
+Revises: 0a6cbbef9325
+Create Date: 2026-10-18 10:12:41.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b9a2d53'
+down_revision: Union[str, None] = '0a6cbbef9325'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_officers_department_id_id',
+            'officers',
+            ['department_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_officers_department_id_id',
+            table_name='officers',
+            postgresql_concurrently=True
+        )
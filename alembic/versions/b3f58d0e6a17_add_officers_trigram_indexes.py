@@ -0,0 +1,45 @@
+"""add_officers_trigram_indexes
+
+Revision ID: b3f58d0e6a17
+Revises: 7c1e4b9a2d53
+Create Date: 2026-10-18 11:02:15.224907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f58d0e6a17'
+down_revision: Union[str, None] = '7c1e4b9a2d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('first_name', 'last_name', 'email')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(
+                f'ix_officers_{column}_trgm',
+                'officers',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in TRIGRAM_COLUMNS:
+            op.drop_index(
+                f'ix_officers_{column}_trgm',
+                table_name='officers',
+                postgresql_concurrently=True
+            )
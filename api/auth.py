@@ -1,14 +1,15 @@
 from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.database import get_session
+from db.database import get_session, get_read_session, AsyncSessionLocal
 from db.models import User
+from ratelimit import limit_login_attempts
 from schemas.auth import UserCreateResponse, TokenInfo
-from utils import hash_password, verify_password, create_access_token
+from utils import hash_password, verify_and_update_password, create_access_token, user_cache
 
 router = APIRouter(
     prefix="/auth",
@@ -16,10 +17,19 @@ router = APIRouter(
 )
 
 
-@router.post("/token/")
+async def _store_rehashed_password(user_id: int, password: str):
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(User).filter(User.id == user_id).values(password=password)
+        )
+        await session.commit()
+
+
+@router.post("/token/", dependencies=[Depends(limit_login_attempts)])
 async def get_token(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        session: Annotated[AsyncSession, Depends(get_session)]
+        session: Annotated[AsyncSession, Depends(get_read_session)],
+        background_tasks: BackgroundTasks
 ) -> TokenInfo:
 
     db_user: User = (
@@ -34,19 +44,24 @@ async def get_token(
             detail='Invalid email.'
         )
 
-    if not verify_password(form_data.password, db_user.password):
+    verified, rehashed_password = await verify_and_update_password(form_data.password, db_user.password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid password.'
         )
 
+    # the stored hash uses another cost; store the new one after the response is sent
+    if rehashed_password:
+        background_tasks.add_task(_store_rehashed_password, db_user.id, rehashed_password)
+
     access_token = create_access_token(db_user.id)
     return TokenInfo(
         access_token=access_token
     )
 
 
-@router.post("/register/")
+@router.post("/register/", dependencies=[Depends(limit_login_attempts)])
 async def create_user(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
         session: Annotated[AsyncSession, Depends(get_session)]
@@ -66,7 +81,7 @@ async def create_user(
             detail='User already exists.'
         )
 
-    hashed_password = hash_password(password)
+    hashed_password = await hash_password(password)
     new_user = User(
         email=email,
         password=hashed_password
@@ -75,6 +90,7 @@ async def create_user(
     session.add(new_user)
     await session.commit()
     await session.refresh(new_user)
+    await user_cache.delete(new_user.id)
 
     return UserCreateResponse(
         id=new_user.id,
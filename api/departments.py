@@ -1,16 +1,20 @@
-from fastapi import HTTPException, Depends, APIRouter, status
+from fastapi import HTTPException, Depends, APIRouter, Query, Request, Response, status
+from enum import Enum
 from typing import Annotated
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.database import get_session
-from db.models import Department
+from db.database import get_session, get_read_session
+from db.models import Department, Officer
 from schemas.departments import DepartmentCreateRequest, DepartmentCreateResponse, DepartmentUpdateRequest, \
-    DepartmentUpdateResponse, DepartmentDetailResponse, DepartmentsListResponse, DepartmentInfo, \
-    DepartmentDeleteResponse
-from utils import logged_in
+    DepartmentUpdateResponse, DepartmentDetailResponse, DepartmentsListResponse, \
+    DepartmentDeleteResponse, DepartmentStats, DepartmentsStatsResponse, DepartmentMergeResponse
+from cache import Cache
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, DEPARTMENT_CACHE_SIZE, DEPARTMENT_CACHE_TTL
+from utils import logged_in, json_response, encode_cursor, decode_cursor, CountMode, count_rows
+from versions import bump, current, get_validators, is_not_modified, may_lag
 
 router = APIRouter(
     prefix="/departments",
@@ -18,31 +22,128 @@ router = APIRouter(
     dependencies=[Depends(logged_in)]
 )
 
+class OfficersOnDelete(str, Enum):
+    reassign = "reassign"
+    detach = "detach"
+    delete = "delete"
 
-@router.get("/")
+
+# keys carry the departments version, so every write retires all cached reads
+department_cache = Cache("departments", DEPARTMENT_CACHE_SIZE, DEPARTMENT_CACHE_TTL)
+
+
+async def _cache_department(department: dict):
+    version, _ = await current("departments")
+    await department_cache.set(f"{version}:{department['id']}", department)
+
+
+async def get_cached_department(session: AsyncSession, department_id: int) -> dict | None:
+    version, modified = await current("departments")
+    key = f"{version}:{department_id}"
+    department = await department_cache.get(key)
+    if department is None:
+        row = (
+            await session.execute(
+                select(Department.id, Department.name).filter(Department.id == department_id)
+            )
+        ).first()
+        if row is None:
+            return None
+        department = {"id": row.id, "name": row.name}
+        if not may_lag(modified):
+            await department_cache.set(key, department)
+    return department
+
+
+@router.get("/", response_model=DepartmentsListResponse)
 async def get_departments_list(
-        session: Annotated[AsyncSession, Depends(get_session)]
-)-> DepartmentsListResponse:
-    # db_departments = session.query(Department).all()
-    db_departments = (
-        await session.execute(select(Department))
-    ).scalars()
+        request: Request,
+        session: Annotated[AsyncSession, Depends(get_read_session)],
+        limit: Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)] = PAGE_SIZE_DEFAULT,
+        cursor: str | None = None,
+        count: CountMode = CountMode.exact
+)-> Response:
+    validators = await get_validators("departments")
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
 
-    if not db_departments:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Departments not found'
+    total = await count_rows(session, "departments", select(Department.id), count, "all")
+
+    version, modified = await current("departments")
+    key = f"{version}:list:{cursor}:{limit}"
+    page = await department_cache.get(key)
+    if page is None:
+        query = select(Department.id, Department.name)
+        if cursor:
+            last_id, = decode_cursor(cursor, 1)
+            query = query.filter(Department.id > last_id)
+        query = query.order_by(Department.id).limit(limit + 1)
+
+        rows = (
+            await session.execute(query)
+        ).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].id)
+
+        page = {
+            "data": [{"id": row.id, "name": row.name} for row in rows],
+            "next_cursor": next_cursor,
+        }
+        if not may_lag(modified):
+            await department_cache.set(key, page)
+
+    return json_response(
+        {
+            "total": total,
+            "data": page["data"],
+            "next_cursor": page["next_cursor"],
+        },
+        headers=validators
+    )
+
+
+@router.get("/stats/")
+async def get_departments_stats(
+        request: Request,
+        response: Response,
+        session: Annotated[AsyncSession, Depends(get_read_session)]
+)-> DepartmentsStatsResponse:
+    validators = await get_validators("departments", "officers")
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    response.headers.update(validators)
+
+    # the full join also yields one row with a NULL department for unassigned officers
+    rows = (
+        await session.execute(
+            select(Department.id, Department.name, func.count(Officer.id))
+            .select_from(Department)
+            .join(Officer, Officer.department_id == Department.id, full=True)
+            .group_by(Department.id)
+            .order_by(Department.id)
         )
+    ).all()
+
     data = []
-    for department in db_departments:
+    unassigned_officers = 0
+    for department_id, name, officer_count in rows:
+        if department_id is None:
+            unassigned_officers = officer_count
+            continue
         data.append(
-            DepartmentInfo(
-                id=department.id,
-                name=department.name
+            DepartmentStats(
+                id=department_id,
+                name=name,
+                officer_count=officer_count
             )
         )
-    return DepartmentsListResponse(
-        total=len(data),
+    return DepartmentsStatsResponse(
+        total_departments=len(data),
+        total_officers=sum(department.officer_count for department in data) + unassigned_officers,
+        unassigned_officers=unassigned_officers,
         data=data
     )
 
@@ -62,6 +163,8 @@ async def create_department(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Department already exists."
         )
+    await bump("departments")
+    await _cache_department({"id": db_department.id, "name": db_department.name})
 
     return DepartmentCreateResponse(
         id=db_department.id,
@@ -69,27 +172,24 @@ async def create_department(
     )
 
 
-@router.get("/{department_id}/")
+@router.get("/{department_id}/", response_model=DepartmentDetailResponse)
 async def get_department(
         department_id: int,
-        session: Annotated[AsyncSession, Depends(get_session)]
-)-> DepartmentDetailResponse:
-    # db_department = session.query(Department).filter(Department.id == department_id).first()
-    db_department = (
-        await session.execute(
-            select(Department).filter(Department.id == department_id)
-        )
-    ).scalar()
+        request: Request,
+        session: Annotated[AsyncSession, Depends(get_read_session)]
+)-> Response:
+    validators = await get_validators("departments")
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+    db_department = await get_cached_department(session, department_id)
 
     if not db_department:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Department not found'
         )
-    return DepartmentDetailResponse(
-        id=db_department.id,
-        name=db_department.name
-    )
+    return json_response(db_department, headers=validators)
 
 
 
@@ -99,59 +199,134 @@ async def update_department(
         department: DepartmentUpdateRequest,
         session: Annotated[AsyncSession, Depends(get_session)]
 )-> DepartmentUpdateResponse:
-    # db_department = session.query(Department).filter(Department.id == department_id).first()
-    db_department = (
-        await session.execute(
-            select(Department).filter(Department.id == department_id)
-        )
-    ).scalar()
-
-    if not db_department:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Department not found'
-        )
-
     if department.name:
-        db_department.name = department.name
+        query = (
+            update(Department)
+            .filter(Department.id == department_id)
+            .values(name=department.name)
+            .returning(Department.id, Department.name)
+        )
+    else:
+        query = select(Department.id, Department.name).filter(Department.id == department_id)
 
     try:
+        db_department = (
+            await session.execute(query)
+        ).first()
         await session.commit()
-        await session.refresh(db_department)
     except IntegrityError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Department already exists."
         )
 
+    if not db_department:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Department not found'
+        )
+
+    if department.name:
+        await bump("departments")
+        await _cache_department({"id": db_department.id, "name": db_department.name})
+
     return DepartmentUpdateResponse(
         id=db_department.id,
         name=db_department.name
     )
 
 
-
-@router.delete("/{department_id}/delete/")
-async def delete_department(
+async def _check_target_department(
+        session: AsyncSession,
         department_id: int,
-        session: Annotated[AsyncSession, Depends(get_session)]
-)-> DepartmentDeleteResponse:
-    # db_department = session.query(Department).filter(Department.id == department_id).first()
-    db_department = (
+        target_id: int | None
+):
+    if target_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Target department is required."
+        )
+    if target_id == department_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Target department must differ from the department."
+        )
+    if not await get_cached_department(session, target_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Target department not found'
+        )
+
+
+async def _delete_department(session: AsyncSession, department_id: int):
+    deleted_id = (
         await session.execute(
-            select(Department).filter(Department.id == department_id)
+            delete(Department)
+            .filter(Department.id == department_id)
+            .returning(Department.id)
         )
     ).scalar()
 
-    if not db_department:
+    if deleted_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Department not found'
         )
 
-    await session.delete(db_department)
+
+@router.post("/{department_id}/merge-into/{target_id}/")
+async def merge_department(
+        department_id: int,
+        target_id: int,
+        session: Annotated[AsyncSession, Depends(get_session)]
+)-> DepartmentMergeResponse:
+    await _check_target_department(session, department_id, target_id)
+
+    moved = (
+        await session.execute(
+            update(Officer)
+            .filter(Officer.department_id == department_id)
+            .values(department_id=target_id)
+            .execution_options(synchronize_session=False)
+        )
+    ).rowcount
+    await _delete_department(session, department_id)
+
     await session.commit()
-    return DepartmentDeleteResponse(
-        message="Department Successfully Deleted"
+    await bump("departments", "officers")
+    return DepartmentMergeResponse(
+        message="Department Successfully Merged",
+        moved_officers=moved
     )
 
+
+@router.delete("/{department_id}/delete/")
+async def delete_department(
+        department_id: int,
+        session: Annotated[AsyncSession, Depends(get_session)],
+        officers: OfficersOnDelete = OfficersOnDelete.detach,
+        reassign_to: int | None = None
+)-> DepartmentDeleteResponse:
+    # officers are handled with one set-based statement in the same transaction
+    if officers == OfficersOnDelete.delete:
+        query = delete(Officer).filter(Officer.department_id == department_id)
+    else:
+        if officers == OfficersOnDelete.reassign:
+            await _check_target_department(session, department_id, reassign_to)
+        query = (
+            update(Officer)
+            .filter(Officer.department_id == department_id)
+            .values(department_id=reassign_to if officers == OfficersOnDelete.reassign else None)
+        )
+
+    affected = (
+        await session.execute(query.execution_options(synchronize_session=False))
+    ).rowcount
+    await _delete_department(session, department_id)
+
+    await session.commit()
+    await bump("departments", "officers")
+    return DepartmentDeleteResponse(
+        message="Department Successfully Deleted",
+        affected_officers=affected
+    )
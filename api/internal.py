@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+
+from db.database import async_engine, pool_status
+from schemas.internal import PoolStatsResponse
+from utils import logged_in
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"]
+)
+
+
+@router.get("/pool/", dependencies=[Depends(logged_in)])
+async def get_pool_stats() -> PoolStatsResponse:
+    return PoolStatsResponse(**pool_status(async_engine))
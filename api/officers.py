@@ -1,13 +1,25 @@
+import csv
+import io
+import json
+from enum import Enum
 from typing import Annotated
-from fastapi import Depends, HTTPException, APIRouter, status
-from sqlalchemy import select
+from fastapi import Depends, HTTPException, APIRouter, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, delete, func, insert, or_, select, tuple_, union_all, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
-from db.database import get_session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from db.database import get_session, get_read_session, read_sessionmaker
+from api.departments import get_cached_department
 from db.models import Officer, Department
-from schemas.officers import OfficerCreateRequest, OfficerCreateResponse, OfficersListResponse, OfficerInfo, \
-    OfficerDetailResponse, OfficerUpdateRequest, OfficerUpdateResponse, OfficerDeleteResponse
-from utils import logged_in
+from schemas.officers import OfficerCreateRequest, OfficerCreateResponse, OfficersListResponse, \
+    OfficerDetailResponse, OfficerUpdateRequest, OfficerUpdateResponse, OfficerDeleteResponse, \
+    OfficerBulkCreateRequest, OfficerBulkCreateResponse, OfficerBulkCreateResult, OfficerSearchResult, \
+    OfficersSearchResponse, OfficerBulkUpdateRequest, OfficerBulkUpdateResponse, OfficerCreateJobResponse, \
+    OfficerJobResponse
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX, EXPORT_CHUNK_SIZE, SEARCH_LIMIT_DEFAULT, SEARCH_LIMIT_MAX
+from ingest import ingest_queue, job_cache
+from utils import logged_in, json_response, encode_cursor, decode_cursor, CountMode, count_rows
+from versions import bump, get_validators, is_not_modified
 
 router = APIRouter(
     prefix="/officers",
@@ -15,54 +27,185 @@ router = APIRouter(
     dependencies=[Depends(logged_in)]
 )
 
+OFFICER_FIELDS = ("id", "first_name", "last_name", "email", "department_id")
+OFFICER_COLUMNS = tuple(getattr(Officer, field) for field in OFFICER_FIELDS)
 
-@router.get("/")
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+# Read handlers select plain columns and return orjson-encoded responses directly,
+# skipping ORM hydration and FastAPI's re-validation of the response model.
+@router.get("/", response_model=OfficersListResponse)
 async def get_officers_list(
-        session: Annotated[AsyncSession, Depends(get_session)],
-        department_id: int | None = None
-) -> OfficersListResponse:
-    query = select(Officer)
+        request: Request,
+        session: Annotated[AsyncSession, Depends(get_read_session)],
+        department_id: int | None = None,
+        limit: Annotated[int, Query(ge=1, le=PAGE_SIZE_MAX)] = PAGE_SIZE_DEFAULT,
+        cursor: str | None = None,
+        count: CountMode = CountMode.exact
+) -> Response:
+    validators = await get_validators("officers")
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+    keyset = (Officer.department_id, Officer.id)
+    query = select(*OFFICER_COLUMNS)
     if department_id:
         query = query.filter(Officer.department_id == department_id)
+    total = await count_rows(session, "officers", query, count, f"department:{department_id}")
+    if cursor:
+        last_department_id, last_id = decode_cursor(cursor, 2)
+        if last_department_id is None:
+            query = query.filter(Officer.department_id.is_(None), Officer.id > last_id)
+        elif department_id:
+            query = query.filter(tuple_(*keyset) > tuple_(last_department_id, last_id))
+        else:
+            # Officers without a department sort last. They come from a second
+            # index-ordered branch, because an OR on the keyset condition would
+            # stop the (department_id, id) index from bounding the scan.
+            page = union_all(
+                query.filter(tuple_(*keyset) > tuple_(last_department_id, last_id))
+                .order_by(*keyset)
+                .limit(limit + 1),
+                query.filter(Officer.department_id.is_(None))
+                .order_by(Officer.id)
+                .limit(limit + 1)
+            ).subquery()
+            query = select(page)
+            keyset = (page.c.department_id, page.c.id)
+    query = query.order_by(*keyset).limit(limit + 1)
 
-    db_officers = (
+    rows = (
         await session.execute(query)
-    ).scalars()
+    ).all()
 
-    if not db_officers:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Officers not found'
-        )
-
-    data = []
-    for officer in db_officers:
-        data.append(
-            OfficerInfo(
-                id=officer.id,
-                first_name=officer.first_name,
-                last_name=officer.last_name,
-                email=officer.email,
-                department_id=officer.department_id
-            )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].department_id, rows[-1].id)
+
+    return json_response(
+        {
+            "total": total,
+            "data": [dict(zip(OFFICER_FIELDS, row)) for row in rows],
+            "next_cursor": next_cursor,
+        },
+        headers=validators
+    )
+
+
+@router.get("/search/")
+async def search_officers(
+        q: Annotated[str, Query(min_length=3, max_length=100)],
+        request: Request,
+        response: Response,
+        session: Annotated[AsyncSession, Depends(get_read_session)],
+        limit: Annotated[int, Query(ge=1, le=SEARCH_LIMIT_MAX)] = SEARCH_LIMIT_DEFAULT
+) -> OfficersSearchResponse:
+    validators = await get_validators("officers")
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    response.headers.update(validators)
+
+    prefix = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    columns = (Officer.first_name, Officer.last_name, Officer.email)
+
+    # every condition below can be answered from the trigram GIN indexes
+    prefix_match = or_(*(column.ilike(prefix, escape="\\") for column in columns))
+    fuzzy_match = or_(*(column.op("%")(q) for column in columns))
+    score = (
+        func.greatest(*(func.similarity(column, q) for column in columns))
+        + case((prefix_match, 1.0), else_=0.0)
+    ).label("score")
+
+    rows = (
+        await session.execute(
+            select(Officer, score)
+            .filter(or_(prefix_match, fuzzy_match))
+            .order_by(score.desc(), Officer.id)
+            .limit(limit)
         )
+    ).all()
 
-    return OfficersListResponse(
+    data = [
+        OfficerSearchResult(
+            id=officer.id,
+            first_name=officer.first_name,
+            last_name=officer.last_name,
+            email=officer.email,
+            department_id=officer.department_id,
+            score=score
+        )
+        for officer, score in rows
+    ]
+    return OfficersSearchResponse(
         total=len(data),
         data=data
     )
 
 
-@router.post("/create/")
+async def _export_rows(sessionmaker: async_sessionmaker, department_id: int | None):
+    query = select(*OFFICER_COLUMNS)
+    if department_id:
+        query = query.filter(Officer.department_id == department_id)
+    query = query.order_by(Officer.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+    # The request-scoped session is closed before the body is streamed,
+    # so the export owns its session for the lifetime of the response.
+    async with sessionmaker() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+
+async def _export_ndjson(sessionmaker: async_sessionmaker, department_id: int | None):
+    async for rows in _export_rows(sessionmaker, department_id):
+        yield "".join(
+            json.dumps(dict(zip(OFFICER_FIELDS, row))) + "\n" for row in rows
+        )
+
+
+async def _export_csv(sessionmaker: async_sessionmaker, department_id: int | None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(OFFICER_FIELDS)
+    yield buffer.getvalue()
+    async for rows in _export_rows(sessionmaker, department_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+@router.get("/export/")
+async def export_officers(
+        request: Request,
+        format: ExportFormat = ExportFormat.ndjson,
+        department_id: int | None = None
+) -> StreamingResponse:
+    sessionmaker = await read_sessionmaker(request)
+    if format == ExportFormat.csv:
+        return StreamingResponse(
+            _export_csv(sessionmaker, department_id),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="officers.csv"'}
+        )
+    return StreamingResponse(
+        _export_ndjson(sessionmaker, department_id),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/create/", responses={status.HTTP_202_ACCEPTED: {"model": OfficerCreateJobResponse}})
 async def create_officer(
         officer: OfficerCreateRequest,
-        session: Annotated[AsyncSession, Depends(get_session)]
+        session: Annotated[AsyncSession, Depends(get_session)],
+        background: Annotated[bool, Query(alias="async")] = False
 )-> OfficerCreateResponse:
-    db_department = (
-        await session.execute(
-            select(Department).filter(Department.id == officer.department_id)
-        )
-    ).scalar()
+    db_department = await get_cached_department(session, officer.department_id)
 
     if not db_department:
         raise HTTPException(
@@ -70,6 +213,15 @@ async def create_officer(
             detail="Department not found"
         )
 
+    # accepted creates are inserted in batches by the ingest queue
+    if background:
+        job_id = await ingest_queue.submit(officer.model_dump())
+        return json_response(
+            {"job_id": job_id, "status": "queued"},
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Location": f"{router.prefix}/jobs/{job_id}/"}
+        )
+
     db_officer = Officer(
         first_name=officer.first_name,
         last_name=officer.last_name,
@@ -87,6 +239,7 @@ async def create_officer(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Officer with this email already exists."
         )
+    await bump("officers")
 
     return OfficerCreateResponse(
         id=db_officer.id,
@@ -97,16 +250,187 @@ async def create_officer(
     )
 
 
-@router.get("/{officer_id}/")
+@router.get("/jobs/{job_id}/")
+async def get_officer_job(job_id: str) -> OfficerJobResponse:
+    job = await job_cache.get(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return OfficerJobResponse(job_id=job_id, **job)
+
+
+@router.post("/bulk/")
+async def create_officers_bulk(
+        bulk: OfficerBulkCreateRequest,
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> OfficerBulkCreateResponse:
+    department_ids = {item.department_id for item in bulk.items}
+    existing_departments = set(
+        (
+            await session.execute(
+                select(Department.id).filter(Department.id.in_(department_ids))
+            )
+        ).scalars()
+    )
+
+    emails = {item.email for item in bulk.items}
+    existing_emails = set(
+        (
+            await session.execute(
+                select(Officer.email).filter(Officer.email.in_(emails))
+            )
+        ).scalars()
+    )
+
+    results = []
+    valid = []
+    seen_emails = set()
+    for index, item in enumerate(bulk.items):
+        error = None
+        if item.department_id not in existing_departments:
+            error = "Department not found"
+        elif item.email in existing_emails:
+            error = "Officer with this email already exists."
+        elif item.email in seen_emails:
+            error = "Duplicate email in batch."
+        seen_emails.add(item.email)
+
+        result = OfficerBulkCreateResult(index=index, error=error)
+        results.append(result)
+        if error is None:
+            valid.append((result, item))
+
+    failed = len(results) - len(valid)
+    if failed and bulk.atomic:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[result.model_dump() for result in results if result.error]
+        )
+
+    if valid:
+        try:
+            created_ids = (
+                await session.execute(
+                    insert(Officer).returning(Officer.id, sort_by_parameter_order=True),
+                    [item.model_dump() for _, item in valid]
+                )
+            ).scalars().all()
+            await session.commit()
+        except IntegrityError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Officer with this email already exists."
+            )
+        await bump("officers")
+
+        for (result, _), officer_id in zip(valid, created_ids):
+            result.id = officer_id
+
+    return OfficerBulkCreateResponse(
+        created=len(valid),
+        failed=failed,
+        results=results
+    )
+
+
+@router.patch("/bulk/")
+async def update_officers_bulk(
+        bulk: OfficerBulkUpdateRequest,
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> OfficerBulkUpdateResponse:
+    if not bulk.updates and not bulk.transfer:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nothing to update."
+        )
+
+    department_ids = {item.department_id for item in bulk.updates if item.department_id}
+    if bulk.transfer:
+        department_ids.add(bulk.transfer.to_department_id)
+    if department_ids:
+        existing_departments = set(
+            (
+                await session.execute(
+                    select(Department.id).filter(Department.id.in_(department_ids))
+                )
+            ).scalars()
+        )
+        missing = department_ids - existing_departments
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Departments not found: {sorted(missing)}"
+            )
+
+    rows = [
+        {field: value for field, value in item.model_dump().items() if value}
+        for item in bulk.updates
+    ]
+    rows = [row for row in rows if len(row) > 1]
+    not_found = []
+    if rows:
+        existing_officers = set(
+            (
+                await session.execute(
+                    select(Officer.id).filter(Officer.id.in_({row["id"] for row in rows}))
+                )
+            ).scalars()
+        )
+        not_found = sorted({row["id"] for row in rows} - existing_officers)
+        rows = [row for row in rows if row["id"] in existing_officers]
+
+    transferred = 0
+    try:
+        if rows:
+            # ORM bulk UPDATE by primary key: one executemany per distinct set of columns
+            await session.execute(update(Officer), rows)
+
+        if bulk.transfer:
+            query = (
+                update(Officer)
+                .filter(Officer.department_id == bulk.transfer.from_department_id)
+                .values(department_id=bulk.transfer.to_department_id)
+                .execution_options(synchronize_session=False)
+            )
+            if bulk.transfer.officer_ids is not None:
+                query = query.filter(Officer.id.in_(bulk.transfer.officer_ids))
+            transferred = (await session.execute(query)).rowcount
+
+        await session.commit()
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Officer with this email already exists."
+        )
+
+    if rows or transferred:
+        await bump("officers")
+
+    return OfficerBulkUpdateResponse(
+        updated=len(rows),
+        transferred=transferred,
+        not_found=not_found
+    )
+
+
+@router.get("/{officer_id}/", response_model=OfficerDetailResponse)
 async def get_officer(
         officer_id: int,
-        session: Annotated[AsyncSession, Depends(get_session)]
-) -> OfficerDetailResponse:
+        request: Request,
+        session: Annotated[AsyncSession, Depends(get_read_session)]
+) -> Response:
+    validators = await get_validators("officers")
+    if is_not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
     db_officer = (
         await session.execute(
-            select(Officer).filter(Officer.id == officer_id)
+            select(*OFFICER_COLUMNS).filter(Officer.id == officer_id)
         )
-    ).scalar()
+    ).first()
 
     if not db_officer:
         raise HTTPException(
@@ -114,13 +438,7 @@ async def get_officer(
             detail='Officer not found'
         )
 
-    return OfficerDetailResponse(
-        id=db_officer.id,
-        first_name=db_officer.first_name,
-        last_name=db_officer.last_name,
-        email=db_officer.email,
-        department_id=db_officer.department_id
-    )
+    return json_response(dict(zip(OFFICER_FIELDS, db_officer)), headers=validators)
 
 
 @router.put("/{officer_id}/update/")
@@ -129,43 +447,38 @@ async def update_department(
         officer: OfficerUpdateRequest,
         session: Annotated[AsyncSession, Depends(get_session)]
 )-> OfficerUpdateResponse:
-    db_officer = (
-        await session.execute(
-            select(Officer).filter(Officer.id == officer_id)
-        )
-    ).scalar()
-
-    if not db_officer:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Officer not found'
+    values = {field: value for field, value in officer.model_dump().items() if value}
+    if values:
+        query = (
+            update(Officer)
+            .filter(Officer.id == officer_id)
+            .values(**values)
+            .returning(*OFFICER_COLUMNS)
         )
-
-    if officer.first_name:
-        db_officer.first_name = officer.first_name
-    if officer.last_name:
-        db_officer.last_name = officer.last_name
-    if officer.email:
-        db_officer.email = officer.email
-    if officer.department_id:
-        db_officer.department_id = officer.department_id
+    else:
+        query = select(*OFFICER_COLUMNS).filter(Officer.id == officer_id)
 
     try:
+        db_officer = (
+            await session.execute(query)
+        ).first()
         await session.commit()
-        await session.refresh(db_officer)
     except IntegrityError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Officer with this email already exists."
         )
 
-    return OfficerUpdateResponse(
-        id=db_officer.id,
-        first_name=db_officer.first_name,
-        last_name=db_officer.last_name,
-        email=db_officer.email,
-        department_id=db_officer.department_id
-    )
+    if not db_officer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Officer not found'
+        )
+
+    if values:
+        await bump("officers")
+
+    return OfficerUpdateResponse(**dict(zip(OFFICER_FIELDS, db_officer)))
 
 
 @router.delete("/{officer_id}/delete/")
@@ -173,20 +486,22 @@ async def delete_officer(
         officer_id: int,
         session: Annotated[AsyncSession, Depends(get_session)]
 )-> OfficerDeleteResponse:
-    db_officer = (
+    deleted_id = (
         await session.execute(
-            select(Officer).filter(Officer.id == officer_id)
+            delete(Officer)
+            .filter(Officer.id == officer_id)
+            .returning(Officer.id)
         )
     ).scalar()
 
-    if not db_officer:
+    if deleted_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Officer not found'
         )
 
-    await session.delete(db_officer)
     await session.commit()
+    await bump("officers")
     return OfficerDeleteResponse(
         message="Officer Successfully Deleted"
     )
@@ -0,0 +1,6 @@
+import os
+
+# The token scenario logs in as one user thousands of times, which the login
+# rate limits would answer with 429. This runs before config is imported, and
+# the uvicorn subprocess inherits it through os.environ.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
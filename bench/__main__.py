@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import json
+import platform
+import sys
+from datetime import datetime, UTC
+
+from bench.runner import SCENARIOS, asgi_client, socket_client, run_benchmarks, compare
+from bench.seed import seed
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+async def _run(args) -> list[dict]:
+    results = []
+    for size in args.sizes:
+        if not args.no_seed:
+            seconds = await seed(args.departments, size, args.users)
+            print(f"seeded {size} officers in {seconds:.1f}s")
+        for transport in args.transports:
+            if transport == "asgi":
+                client_context = asgi_client()
+            else:
+                client_context = socket_client(args.url)
+            async with client_context as client:
+                results += await run_benchmarks(
+                    client, transport, size, args.scenarios, args.concurrency, args.requests, args.warmup
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = subparsers.add_parser("seed", help="reset and seed the configured database")
+    seed_parser.add_argument("--departments", type=int, default=50)
+    seed_parser.add_argument("--officers", type=int, default=10000)
+    seed_parser.add_argument("--users", type=int, default=10)
+    seed_parser.add_argument("--yes", action="store_true", help="confirm that DB_URI may be truncated")
+
+    run_parser = subparsers.add_parser("run", help="seed each data size and benchmark the API")
+    run_parser.add_argument("--sizes", type=_int_list, default=[1000, 100000], help="officer counts")
+    run_parser.add_argument("--departments", type=int, default=50)
+    run_parser.add_argument("--users", type=int, default=10)
+    run_parser.add_argument("--concurrency", type=_int_list, default=[1, 16, 64])
+    run_parser.add_argument("--requests", type=int, default=1000)
+    run_parser.add_argument("--warmup", type=int, default=50)
+    run_parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    run_parser.add_argument("--transports", type=lambda value: value.split(","), default=["asgi", "socket"])
+    run_parser.add_argument("--url", help="benchmark an already running server instead of starting uvicorn")
+    run_parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--baseline", help="results file to compare against")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+    run_parser.add_argument("--yes", action="store_true", help="confirm that DB_URI may be truncated")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+
+    if args.command in ("seed", "run") and not args.yes and not getattr(args, "no_seed", False):
+        parser.error("seeding truncates the officers, departments and users tables; pass --yes to confirm")
+
+    if args.command == "seed":
+        seconds = asyncio.run(seed(args.departments, args.officers, args.users))
+        print(f"seeded in {seconds:.1f}s")
+        return
+
+    if args.command == "run":
+        results = asyncio.run(_run(args))
+        with open(args.output, "w") as output:
+            json.dump(
+                {
+                    "created_at": datetime.now(UTC).isoformat(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                output,
+                indent=2
+            )
+        print(f"results written to {args.output}")
+        if not args.baseline:
+            return
+        current, baseline_path = results, args.baseline
+    else:
+        with open(args.current) as current_file:
+            current = json.load(current_file)["results"]
+        baseline_path = args.baseline
+
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
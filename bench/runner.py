@@ -0,0 +1,190 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+
+import httpx
+
+from bench.seed import PASSWORD, user_email
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    authenticated: bool = True
+
+
+SCENARIOS = {
+    "officers_list": Scenario("officers_list", "GET", "/officers/?limit=100"),
+    "officers_detail": Scenario("officers_detail", "GET", "/officers/1/"),
+    "departments_list": Scenario("departments_list", "GET", "/departments/"),
+    "departments_detail": Scenario("departments_detail", "GET", "/departments/1/"),
+    "token": Scenario("token", "POST", "/auth/token/", authenticated=False),
+}
+
+
+@dataclass
+class Result:
+    transport: str
+    size: int
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@asynccontextmanager
+async def asgi_client():
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def socket_client(url: str | None = None):
+    process = None
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            env=os.environ.copy()
+        )
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=None)) as client:
+            for _ in range(100):
+                try:
+                    await client.get("/docs")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    response = await client.post(
+        "/auth/token/",
+        data={"username": user_email(0), "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        scenario: Scenario,
+        token: str,
+        concurrency: int,
+        requests: int
+) -> tuple[list[float], int, float]:
+    headers = {"Authorization": f"Bearer {token}"} if scenario.authenticated else {}
+    data = {"username": user_email(0), "password": PASSWORD} if scenario.method == "POST" else None
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, scenario.path, headers=headers, data=data)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_benchmarks(
+        client: httpx.AsyncClient,
+        transport: str,
+        size: int,
+        scenarios: list[str],
+        concurrency_levels: list[int],
+        requests: int,
+        warmup: int
+) -> list[dict]:
+    token = await login(client)
+    results = []
+    for name in scenarios:
+        scenario = SCENARIOS[name]
+        for concurrency in concurrency_levels:
+            await run_scenario(client, scenario, token, concurrency, warmup)
+            latencies, errors, seconds = await run_scenario(client, scenario, token, concurrency, requests)
+            result = Result(
+                transport=transport,
+                size=size,
+                scenario=name,
+                concurrency=concurrency,
+                requests=len(latencies),
+                errors=errors,
+                seconds=seconds,
+                throughput=len(latencies) / seconds if seconds else 0.0,
+                p50_ms=percentile(latencies, 0.50) * 1000,
+                p95_ms=percentile(latencies, 0.95) * 1000,
+                p99_ms=percentile(latencies, 0.99) * 1000,
+            )
+            print(
+                f"{transport:6} size={size:<8} {name:20} c={concurrency:<4} "
+                f"{result.throughput:9.1f} req/s  p50={result.p50_ms:7.2f}ms "
+                f"p95={result.p95_ms:7.2f}ms p99={result.p99_ms:7.2f}ms errors={errors}"
+            )
+            results.append(asdict(result))
+    return results
+
+
+def compare(current: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    key = lambda result: (result["transport"], result["size"], result["scenario"], result["concurrency"])
+    baseline_by_key = {key(result): result for result in baseline}
+    regressions = []
+    for result in current:
+        base = baseline_by_key.get(key(result))
+        if base is None:
+            continue
+        throughput_change = result["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        line = (
+            f"{result['transport']:6} size={result['size']:<8} {result['scenario']:20} "
+            f"c={result['concurrency']:<4} throughput {throughput_change:+7.1%}  p95 {p95_change:+7.1%}"
+        )
+        print(line)
+        if throughput_change < -threshold or p95_change > threshold:
+            regressions.append(line)
+    return regressions
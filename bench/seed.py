@@ -0,0 +1,53 @@
+import time
+
+from sqlalchemy import insert, text
+
+from db.database import AsyncSessionLocal
+from db.models import Department, Officer, User
+from utils import pwd_context
+
+CHUNK_SIZE = 5000
+PASSWORD = "bench-password"
+
+
+def user_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+async def seed(departments: int, officers: int, users: int) -> float:
+    start = time.perf_counter()
+    # every bench user shares one hash; hashing thousands of passwords would dominate seeding
+    password_hash = pwd_context.hash(PASSWORD)
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("TRUNCATE officers, departments, users RESTART IDENTITY CASCADE"))
+
+        department_ids = (
+            await session.execute(
+                insert(Department).returning(Department.id, sort_by_parameter_order=True),
+                [{"name": f"Department {index}"} for index in range(departments)]
+            )
+        ).scalars().all()
+
+        for offset in range(0, officers, CHUNK_SIZE):
+            await session.execute(
+                insert(Officer),
+                [
+                    {
+                        "first_name": f"First{index}",
+                        "last_name": f"Last{index}",
+                        "email": f"officer-{index}@example.com",
+                        "department_id": department_ids[index % len(department_ids)],
+                    }
+                    for index in range(offset, min(offset + CHUNK_SIZE, officers))
+                ]
+            )
+
+        await session.execute(
+            insert(User),
+            [{"email": user_email(index), "password": password_hash} for index in range(users)]
+        )
+        await session.commit()
+        await session.execute(text("ANALYZE officers, departments, users"))
+
+    return time.perf_counter() - start
@@ -0,0 +1,116 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+
+from config import CACHE_URL
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+_redis_client = None
+
+caches: list["Cache"] = []
+
+
+def get_redis():
+    global _redis_client
+    if _redis_client is None:
+        if redis is None:
+            raise RuntimeError("CACHE_URL is set but the redis package is not installed")
+        _redis_client = redis.from_url(CACHE_URL)
+    return _redis_client
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def add(self, key: str, value: Any, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+
+class RedisBackend:
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.client.set(key, json.dumps(value), px=int(ttl * 1000))
+
+    async def add(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(await self.client.set(key, json.dumps(value), px=int(ttl * 1000), nx=True))
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+
+class Cache:
+    """Bounded TTL cache, shared between workers when CACHE_URL is set.
+
+    Values must be JSON-serializable; ``None`` is indistinguishable from a miss.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        if CACHE_URL:
+            self.backend = RedisBackend(get_redis())
+        else:
+            self.backend = MemoryBackend(maxsize)
+        caches.append(self)
+
+    def _key(self, key) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key) -> Any:
+        value = await self.backend.get(self._key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key, value: Any, ttl: float | None = None):
+        await self.backend.set(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    async def add(self, key, value: Any, ttl: float | None = None) -> bool:
+        """Set the value only if the key is absent; return whether it was set."""
+        return await self.backend.add(self._key(key), value, self.ttl if ttl is None else ttl)
+
+    async def delete(self, key):
+        await self.backend.delete(self._key(key))
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+
+from db.database import async_engine
+from hashing import calibrate_bcrypt_rounds
+from importer import ImportReport, import_officers
+
+
+def calibrate_bcrypt(args):
+    rounds, elapsed_ms = calibrate_bcrypt_rounds(args.target_ms, args.samples)
+    print(f"bcrypt rounds {rounds} hash in {elapsed_ms:.0f} ms on this machine (target {args.target_ms:.0f} ms)")
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+
+def print_import_progress(report: ImportReport):
+    print(f"{report.rows} rows, {report.rows_per_second:.0f} rows/s", flush=True)
+
+
+async def run_import(args, file_format: str) -> ImportReport:
+    try:
+        return await import_officers(
+            args.path, file_format, args.chunk_size, args.rejects, progress=print_import_progress
+        )
+    finally:
+        await async_engine.dispose()
+
+
+def import_file(args):
+    file_format = args.format or ("parquet" if args.path.endswith(".parquet") else "csv")
+    report = asyncio.run(run_import(args, file_format))
+    print(
+        f"{report.rows} rows in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s): "
+        f"{report.loaded} loaded, {report.unchanged} unchanged, {report.rejected} rejected, "
+        f"{report.departments_created} departments created"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python cli.py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate-bcrypt",
+        help="find the bcrypt cost that hashes within a latency target"
+    )
+    calibrate_parser.add_argument("--target-ms", type=float, default=250)
+    calibrate_parser.add_argument("--samples", type=int, default=3)
+    calibrate_parser.set_defaults(handler=calibrate_bcrypt)
+
+    import_parser = subparsers.add_parser(
+        "import-officers",
+        help="load officers from a CSV or Parquet file with first_name, last_name, email and department columns"
+    )
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=("csv", "parquet"), help="defaults to the file extension")
+    import_parser.add_argument("--chunk-size", type=int, default=50000)
+    import_parser.add_argument("--rejects", help="write rejected rows and reasons to this CSV file")
+    import_parser.set_defaults(handler=import_file)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,95 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _optional_int(name: str) -> int | None:
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer, got {value!r}")
+
+
 URL_DATABASE = os.getenv("DB_URI")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", DB_POOL_SIZE))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100))
+DB_REPLICA_URIS = [uri.strip() for uri in os.environ.get("DB_REPLICA_URIS", "").split(",") if uri.strip()]
+DB_REPLICA_RETRY_SECONDS = float(os.environ.get("DB_REPLICA_RETRY_SECONDS", 30))
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
 
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES"))
+ACCESS_TOKEN_EXPIRE_MINUTES = _optional_int("ACCESS_TOKEN_EXPIRE_MINUTES")
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = os.environ.get("ALGORITHM")
+
+PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", 100))
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 1000))
+
+SEARCH_LIMIT_DEFAULT = int(os.environ.get("SEARCH_LIMIT_DEFAULT", 20))
+SEARCH_LIMIT_MAX = int(os.environ.get("SEARCH_LIMIT_MAX", 100))
+
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 1000))
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 10000))
+
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 10000))
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 500))
+INGEST_FLUSH_SECONDS = float(os.environ.get("INGEST_FLUSH_SECONDS", 0.05))
+INGEST_DRAIN_SECONDS = float(os.environ.get("INGEST_DRAIN_SECONDS", 10))
+INGEST_JOB_CACHE_SIZE = int(os.environ.get("INGEST_JOB_CACHE_SIZE", 100000))
+INGEST_JOB_TTL = float(os.environ.get("INGEST_JOB_TTL", 3600))
+
+# number of worker processes serving the app; uvicorn --workers reads the same variable
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+CACHE_URL = os.environ.get("CACHE_URL")
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", 300))
+DEPARTMENT_CACHE_SIZE = int(os.environ.get("DEPARTMENT_CACHE_SIZE", 10000))
+DEPARTMENT_CACHE_TTL = float(os.environ.get("DEPARTMENT_CACHE_TTL", 600))
+COUNT_CACHE_SIZE = int(os.environ.get("COUNT_CACHE_SIZE", 10000))
+COUNT_CACHE_TTL = float(os.environ.get("COUNT_CACHE_TTL", 30))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", 86400))
+IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", 30))
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", 64))
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_STORE_SIZE = int(os.environ.get("RATE_LIMIT_STORE_SIZE", 100000))
+LOGIN_RATE_IP_CAPACITY = float(os.environ.get("LOGIN_RATE_IP_CAPACITY", 20))
+LOGIN_RATE_IP_PER_SECOND = float(os.environ.get("LOGIN_RATE_IP_PER_SECOND", 1))
+LOGIN_RATE_USER_CAPACITY = float(os.environ.get("LOGIN_RATE_USER_CAPACITY", 5))
+LOGIN_RATE_USER_PER_SECOND = float(os.environ.get("LOGIN_RATE_USER_PER_SECOND", 0.1))
+
+
+def validate_settings():
+    errors = []
+    for name, value in (
+        ("SECRET_KEY", SECRET_KEY),
+        ("ALGORITHM", ALGORITHM),
+        ("ACCESS_TOKEN_EXPIRE_MINUTES", ACCESS_TOKEN_EXPIRE_MINUTES),
+    ):
+        if value is None or value == "":
+            errors.append(f"{name} is not set")
+
+    if ACCESS_TOKEN_EXPIRE_MINUTES is not None and ACCESS_TOKEN_EXPIRE_MINUTES <= 0:
+        errors.append("ACCESS_TOKEN_EXPIRE_MINUTES must be positive")
+    if not 0 <= DB_POOL_MIN_SIZE <= DB_POOL_SIZE:
+        errors.append("DB_POOL_MIN_SIZE must be between 0 and DB_POOL_SIZE")
+    if PAGE_SIZE_DEFAULT > PAGE_SIZE_MAX:
+        errors.append("PAGE_SIZE_DEFAULT must not exceed PAGE_SIZE_MAX")
+    # four bind parameters per officer, under asyncpg's 32767 per statement
+    if not 1 <= INGEST_BATCH_SIZE <= 8000:
+        errors.append("INGEST_BATCH_SIZE must be between 1 and 8000")
+    if SEARCH_LIMIT_DEFAULT > SEARCH_LIMIT_MAX:
+        errors.append("SEARCH_LIMIT_DEFAULT must not exceed SEARCH_LIMIT_MAX")
+
+    if errors:
+        raise RuntimeError("Invalid configuration: " + "; ".join(errors))
@@ -1,17 +1,147 @@
-import os
+import itertools
+import time
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from config import URL_DATABASE
+from cache import Cache
+from config import URL_DATABASE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, \
+    DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, DB_REPLICA_URIS, DB_REPLICA_RETRY_SECONDS, READ_YOUR_WRITES_SECONDS
 
-async_engine = create_async_engine(URL_DATABASE)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def _do_get(self):
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.waiters -= 1
+            self.checkouts += 1
+            self.checkout_wait_total += elapsed
+            self.checkout_wait_max = max(self.checkout_wait_max, elapsed)
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "waiters": pool.waiters,
+        "checkouts": pool.checkouts,
+        "checkout_wait_total": pool.checkout_wait_total,
+        "checkout_wait_max": pool.checkout_wait_max,
+    }
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    )
+
+
+# the engine is built at import, before the app's settings check could report this
+if not URL_DATABASE:
+    raise RuntimeError("DB_URI is not set")
+
+async_engine = _create_engine(URL_DATABASE)
+replica_engines = [_create_engine(url) for url in DB_REPLICA_URIS]
 
 AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=async_engine)
+ReplicaSessions = [
+    async_sessionmaker(autocommit=False, autoflush=False, bind=engine) for engine in replica_engines
+]
 
 Base = declarative_base()
 
-async def get_session() -> AsyncSession:
+_replica_cursor = itertools.count()
+_replica_down_until = [0.0] * len(replica_engines)
+
+# clients that wrote recently keep reading from the primary
+recent_writers = Cache("db:recent-writer", 100000, READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session):
+    session.info["committed"] = True
+
+
+def _client_key(request: Request) -> str:
+    return request.client.host if request.client else ""
+
+
+async def _pick_replica(request: Request) -> int | None:
+    if not replica_engines or await recent_writers.get(_client_key(request)):
+        return None
+
+    now = time.monotonic()
+    for _ in range(len(replica_engines)):
+        index = next(_replica_cursor) % len(replica_engines)
+        if _replica_down_until[index] <= now:
+            return index
+    return None
+
+
+async def read_sessionmaker(request: Request) -> async_sessionmaker:
+    index = await _pick_replica(request)
+    if index is None:
+        return AsyncSessionLocal
+    return ReplicaSessions[index]
+
+
+async def get_session(request: Request) -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+        if session.info.get("committed"):
+            await recent_writers.set(_client_key(request), True)
+
+
+def mark_replica_down(index: int):
+    _replica_down_until[index] = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    index = await _pick_replica(request)
+    if index is not None:
+        session = ReplicaSessions[index]()
+        try:
+            # connect before yielding, so an unreachable replica fails over for this request too
+            await session.connection()
+        except (OSError, TimeoutError, OperationalError, InterfaceError):
+            mark_replica_down(index)
+            await session.close()
+            index = None
+
+    if index is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
 
+    async with session:
+        try:
+            yield session
+        except (OSError, TimeoutError, OperationalError, InterfaceError):
+            mark_replica_down(index)
+            raise
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from db.database import Base
@@ -14,6 +14,15 @@ class Department(Base):
 
 class Officer(Base):
     __tablename__ = 'officers'
+    __table_args__ = (
+        Index('ix_officers_department_id_id', 'department_id', 'id'),
+        Index('ix_officers_first_name_trgm', 'first_name',
+              postgresql_using='gin', postgresql_ops={'first_name': 'gin_trgm_ops'}),
+        Index('ix_officers_last_name_trgm', 'last_name',
+              postgresql_using='gin', postgresql_ops={'last_name': 'gin_trgm_ops'}),
+        Index('ix_officers_email_trgm', 'email',
+              postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+    )
 
 
     id = Column(Integer, primary_key=True)
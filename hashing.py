@@ -0,0 +1,22 @@
+import time
+
+from passlib.hash import bcrypt
+
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+
+
+def calibrate_bcrypt_rounds(target_ms: float, samples: int = 3) -> tuple[int, float]:
+    """Return the highest bcrypt cost whose hash time stays within target_ms, and that time."""
+    rounds, elapsed_ms = BCRYPT_MIN_ROUNDS, 0.0
+    for candidate in range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            bcrypt.using(rounds=candidate).hash("calibration")
+            timings.append((time.perf_counter() - start) * 1000)
+        candidate_ms = sorted(timings)[len(timings) // 2]
+        if candidate_ms > target_ms:
+            break
+        rounds, elapsed_ms = candidate, candidate_ms
+    return rounds, elapsed_ms
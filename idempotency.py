@@ -0,0 +1,168 @@
+import asyncio
+import base64
+import hashlib
+import time
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from cache import Cache
+from config import IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL, IDEMPOTENCY_LOCK_SECONDS
+
+IDEMPOTENT_PATHS = frozenset({"/officers/create/", "/departments/create/", "/auth/register/"})
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+# the client is told to retry these, so a stored copy would lock the key out
+RETRYABLE_STATUSES = frozenset({408, 409, 429})
+
+# entries are {"state": "pending"} while the first request runs, then the stored response
+idempotency_cache = Cache("idempotency", IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL)
+
+_inflight: dict[str, asyncio.Event] = {}
+
+
+def _header(scope, name: bytes) -> bytes:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return b""
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _error(status_code: int, detail: str, headers: dict | None = None) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+async def _replay(entry: dict, send):
+    await send({
+        "type": "http.response.start",
+        "status": entry["status"],
+        "headers": [(key.encode("latin-1"), value.encode("latin-1")) for key, value in entry["headers"]]
+                   + [(b"idempotent-replayed", b"true")],
+    })
+    await send({"type": "http.response.body", "body": base64.b64decode(entry["body"])})
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for repeated POSTs with the same Idempotency-Key.
+
+    Keys are scoped to the path and the Authorization header, or the client
+    address when there is none, and a key reused with a different body is
+    rejected. Duplicates that arrive while the first request is still running
+    wait for its response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in IDEMPOTENT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        idempotency_key = _header(scope, b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            await _error(status.HTTP_400_BAD_REQUEST, "Idempotency-Key is too long")(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        # unauthenticated endpoints such as /auth/register/ are scoped by client address instead
+        client = _header(scope, b"authorization") or (scope.get("client") or ("",))[0].encode()
+        key = hashlib.sha256(
+            b"\0".join((scope["path"].encode(), client, idempotency_key))
+        ).hexdigest()
+
+        deadline = time.monotonic() + IDEMPOTENCY_LOCK_SECONDS
+        while True:
+            if await idempotency_cache.add(
+                key, {"state": "pending", "fingerprint": fingerprint}, IDEMPOTENCY_LOCK_SECONDS
+            ):
+                await self._run(key, fingerprint, body, scope, receive, send)
+                return
+
+            entry = await idempotency_cache.get(key)
+            if entry is None:
+                # finished with an error or expired between add and get; claim it again
+                continue
+            if entry["fingerprint"] != fingerprint:
+                await _error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    "Idempotency-Key was already used with a different request body"
+                )(scope, receive, send)
+                return
+            if entry["state"] == "done":
+                await _replay(entry, send)
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                await _error(
+                    status.HTTP_409_CONFLICT,
+                    "A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )(scope, receive, send)
+                return
+            event = _inflight.get(key)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except TimeoutError:
+                    pass
+            else:
+                # the first request runs in another worker
+                await asyncio.sleep(min(POLL_SECONDS, remaining))
+
+    async def _run(self, key: str, fingerprint: str, body: bytes, scope, receive, send):
+        event = _inflight[key] = asyncio.Event()
+        response = {"state": "done", "fingerprint": fingerprint, "status": 500, "headers": [], "body": b""}
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+            # server errors and retryable statuses are not stored, so the retry runs the request again
+            if response["status"] < 500 and response["status"] not in RETRYABLE_STATUSES:
+                response["body"] = base64.b64encode(response["body"]).decode()
+                await idempotency_cache.set(key, response)
+                stored = True
+        finally:
+            if not stored:
+                await idempotency_cache.delete(key)
+            del _inflight[key]
+            event.set()
@@ -0,0 +1,205 @@
+import asyncio
+import csv
+import itertools
+import operator
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from db.database import async_engine
+from versions import bump
+
+OFFICER_COLUMNS = ("first_name", "last_name", "email", "department_id")
+REQUIRED_FIELDS = ("first_name", "last_name", "email", "department")
+
+STAGING_TABLE = "officers_import"
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    loaded: int = 0
+    unchanged: int = 0
+    rejected: int = 0
+    departments_created: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# Readers yield chunks of (first_name, last_name, email, department) string tuples.
+def read_csv_chunks(path: str, chunk_size: int):
+    with open(path, newline="") as source:
+        reader = csv.reader(source)
+        header = next(reader, [])
+        missing = [name for name in REQUIRED_FIELDS if name not in header]
+        if missing:
+            raise RuntimeError(f"{path} has no {', '.join(missing)} column")
+        indexes = [header.index(name) for name in REQUIRED_FIELDS]
+        width = max(indexes) + 1
+        pick = operator.itemgetter(*indexes)
+        empty = ("",) * len(REQUIRED_FIELDS)
+        while chunk := [
+            pick(row) if len(row) >= width else empty
+            for row in itertools.islice(reader, chunk_size)
+        ]:
+            yield chunk
+
+
+def read_parquet_chunks(path: str, chunk_size: int):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet import requires the pyarrow package")
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(REQUIRED_FIELDS)):
+        columns = batch.to_pydict()
+        yield [
+            tuple("" if value is None else str(value) for value in row)
+            for row in zip(*(columns[name] for name in REQUIRED_FIELDS))
+        ]
+
+
+def _clean_chunk(chunk: list[tuple], rejects) -> tuple[list[tuple], int]:
+    """Strip values and split off invalid rows, writing them to rejects if given."""
+    valid = []
+    emails = set()
+    rejected = 0
+    for row in chunk:
+        first_name, last_name, email, department = row
+        values = (first_name.strip(), last_name.strip(), email.strip(), department.strip())
+        first_name, last_name, email, department = values
+        reason = None
+        if not (first_name and last_name and email and department):
+            reason = "missing " + REQUIRED_FIELDS[values.index("")]
+        elif "@" not in email:
+            reason = "invalid email"
+        elif email in emails:
+            # ON CONFLICT cannot update the same row twice in one statement
+            reason = "duplicate email in chunk"
+
+        if reason is None:
+            emails.add(email)
+            valid.append(values)
+            continue
+        rejected += 1
+        if rejects:
+            rejects.writerow((*row, reason))
+    return valid, rejected
+
+
+async def _resolve_departments(pg, names: set[str], department_ids: dict[str, int]) -> int:
+    missing = [name for name in names if name not in department_ids]
+    if not missing:
+        return 0
+
+    created = await pg.fetch(
+        "INSERT INTO departments (name) SELECT unnest($1::text[]) "
+        "ON CONFLICT (name) DO NOTHING RETURNING id, name",
+        missing
+    )
+    for row in created:
+        department_ids[row["name"]] = row["id"]
+
+    if len(created) < len(missing):
+        existing = await pg.fetch(
+            "SELECT id, name FROM departments WHERE name = ANY($1::text[])",
+            [name for name in missing if name not in department_ids]
+        )
+        for row in existing:
+            department_ids[row["name"]] = row["id"]
+    return len(created)
+
+
+async def import_officers(
+        path: str,
+        file_format: str,
+        chunk_size: int,
+        rejects_path: str | None = None,
+        progress: Callable[[ImportReport], None] | None = None
+) -> ImportReport:
+    if file_format == "parquet":
+        chunks = read_parquet_chunks(path, chunk_size)
+    else:
+        chunks = read_csv_chunks(path, chunk_size)
+
+    report = ImportReport()
+    department_ids: dict[str, int] = {}
+    start = time.perf_counter()
+
+    rejects_file = open(rejects_path, "w", newline="") if rejects_path else None
+    rejects = csv.writer(rejects_file) if rejects_file else None
+    if rejects:
+        rejects.writerow((*REQUIRED_FIELDS, "reason"))
+
+    def next_chunk():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+        valid, rejected = _clean_chunk(chunk, rejects)
+        return len(chunk), valid, rejected
+
+    try:
+        async with async_engine.connect() as conn:
+            pg = (await conn.get_raw_connection()).driver_connection
+            await pg.execute(
+                f"CREATE TEMP TABLE {STAGING_TABLE} "
+                "(first_name text, last_name text, email text, department_id integer) "
+                "ON COMMIT DELETE ROWS"
+            )
+            pending = None
+            try:
+                # the next chunk is parsed in a thread while this one is written
+                pending = asyncio.create_task(asyncio.to_thread(next_chunk))
+                while parsed := await pending:
+                    pending = asyncio.create_task(asyncio.to_thread(next_chunk))
+                    rows, valid, rejected = parsed
+                    report.rows += rows
+                    report.rejected += rejected
+
+                    async with pg.transaction():
+                        report.departments_created += await _resolve_departments(
+                            pg, {row[3] for row in valid}, department_ids
+                        )
+                        await pg.copy_records_to_table(
+                            STAGING_TABLE,
+                            records=[
+                                (first_name, last_name, email, department_ids[department])
+                                for first_name, last_name, email, department in valid
+                            ],
+                            columns=OFFICER_COLUMNS
+                        )
+                        # unchanged officers are skipped, so re-imports do not rewrite rows and indexes
+                        status = await pg.execute(
+                            "INSERT INTO officers (first_name, last_name, email, department_id) "
+                            f"SELECT first_name, last_name, email, department_id FROM {STAGING_TABLE} "
+                            "ON CONFLICT (email) DO UPDATE SET "
+                            "first_name = EXCLUDED.first_name, "
+                            "last_name = EXCLUDED.last_name, "
+                            "department_id = EXCLUDED.department_id "
+                            "WHERE (officers.first_name, officers.last_name, officers.department_id) "
+                            "IS DISTINCT FROM (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.department_id)"
+                        )
+                    loaded = int(status.split()[-1])
+                    report.loaded += loaded
+                    report.unchanged += len(valid) - loaded
+                    report.seconds = time.perf_counter() - start
+                    if progress:
+                        progress(report)
+            finally:
+                if pending is not None:
+                    # a parse thread cannot be cancelled; let it finish before closing the rejects file
+                    await asyncio.gather(pending, return_exceptions=True)
+                # the connection goes back to the pool, which would keep the table
+                await pg.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    # only reaches running servers when the version counters are shared through CACHE_URL
+    await bump("departments", "officers")
+    report.seconds = time.perf_counter() - start
+    return report
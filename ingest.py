@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from cache import Cache
+from config import INGEST_QUEUE_SIZE, INGEST_BATCH_SIZE, INGEST_FLUSH_SECONDS, INGEST_JOB_CACHE_SIZE, \
+    INGEST_JOB_TTL
+from db.database import AsyncSessionLocal
+from db.models import Department, Officer
+from versions import bump
+
+logger = logging.getLogger(__name__)
+
+# job statuses are only visible to other workers when CACHE_URL is set
+job_cache = Cache("officers:jobs", INGEST_JOB_CACHE_SIZE, INGEST_JOB_TTL)
+
+
+class OfficerIngestQueue:
+    """Collects accepted officer creates and inserts them in batches.
+
+    A batch is flushed when it reaches INGEST_BATCH_SIZE items or INGEST_FLUSH_SECONDS
+    after its first item, so one commit covers many requests.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, flush_seconds: float):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue(maxsize)
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, officer: dict) -> str:
+        if self._queue.full():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending officer creates",
+                headers={"Retry-After": "1"}
+            )
+        job_id = uuid.uuid4().hex
+        # stored before queueing, so a fast flush cannot be overwritten by "queued"
+        await job_cache.set(job_id, {"status": "queued"})
+        try:
+            self._queue.put_nowait((job_id, officer))
+        except asyncio.QueueFull:
+            await job_cache.delete(job_id)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending officer creates",
+                headers={"Retry-After": "1"}
+            )
+        return job_id
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        # _run catches flush errors, so only something unexpected ends up here
+        logger.error("Officer ingest task stopped, restarting it", exc_info=task.exception())
+        self.start()
+
+    async def stop(self, timeout: float):
+        if self._task is None:
+            return
+        # let the loop drain what was accepted before the engines are disposed
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.error("Stopping with %d officer creates still queued", self._queue.qsize())
+        self._task.cancel()
+
+    async def _next_batch(self) -> list[tuple[str, dict]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            except Exception:
+                # nothing may end the loop, or later creates would stay queued forever
+                logger.exception("Failed to flush %d queued officers", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _insert(self, batch: list[tuple[str, dict]]) -> list[dict]:
+        async with AsyncSessionLocal() as session:
+            # the department may have been deleted since the request was accepted
+            existing_departments = set(
+                (
+                    await session.execute(
+                        select(Department.id).filter(
+                            Department.id.in_({officer["department_id"] for _, officer in batch})
+                        )
+                    )
+                ).scalars()
+            )
+            officers = [officer for _, officer in batch if officer["department_id"] in existing_departments]
+
+            created = {}
+            if officers:
+                # DO NOTHING also skips later rows repeating an email from the same batch
+                rows = (
+                    await session.execute(
+                        insert(Officer)
+                        .values(officers)
+                        .on_conflict_do_nothing(index_elements=[Officer.email])
+                        .returning(Officer.id, Officer.email)
+                    )
+                ).all()
+                await session.commit()
+                created = {row.email: row.id for row in rows}
+
+        results = []
+        for _, officer in batch:
+            if officer["department_id"] not in existing_departments:
+                results.append({"status": "failed", "error": "Department not found"})
+            elif officer["email"] in created:
+                results.append({"status": "created", "officer_id": created.pop(officer["email"])})
+            else:
+                results.append({"status": "failed", "error": "Officer with this email already exists."})
+        return results
+
+    async def _flush(self, batch: list[tuple[str, dict]]):
+        try:
+            results = await self._insert(batch)
+        except Exception:
+            logger.exception("Failed to insert %d queued officers", len(batch))
+            results = [{"status": "failed", "error": "Database error"}] * len(batch)
+
+        # outside the insert's error handling, so a failing status write or version
+        # bump after the commit cannot mark inserted officers as failed
+        for (job_id, _), result in zip(batch, results):
+            await job_cache.set(job_id, result)
+        if any(result["status"] == "created" for result in results):
+            await bump("officers")
+
+
+ingest_queue = OfficerIngestQueue(INGEST_QUEUE_SIZE, INGEST_BATCH_SIZE, INGEST_FLUSH_SECONDS)
@@ -1,22 +1,64 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
 from api.departments import router as departments_router
 from api.officers import router as officers_router
 from api.auth import router as auth_router
+from api.internal import router as internal_router
+from config import DB_POOL_MIN_SIZE, INGEST_DRAIN_SECONDS, validate_settings
+from db.database import async_engine, replica_engines, mark_replica_down
+from idempotency import IdempotencyMiddleware
+from ingest import ingest_queue
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+from utils import password_executor
+from warmup import warm_engine
 
-
-app = FastAPI()
-# Base.metadata.create_all(bind=engine)
-
-app.include_router(departments_router)
-app.include_router(officers_router)
-app.include_router(auth_router)
-
-
+logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_settings()
+    engines = [async_engine, *replica_engines]
+    primary, *replicas = await asyncio.gather(
+        *(warm_engine(engine, DB_POOL_MIN_SIZE) for engine in engines),
+        return_exceptions=True
+    )
+    if isinstance(primary, BaseException):
+        raise primary
+    # reads fall back to the primary at runtime, so a replica outage must not stop startup
+    for index, error in enumerate(replicas):
+        if isinstance(error, BaseException):
+            logger.error("Could not warm up replica %d, marking it down", index, exc_info=error)
+            mark_replica_down(index)
+    ingest_queue.start()
+    try:
+        yield
+    finally:
+        await ingest_queue.stop(INGEST_DRAIN_SECONDS)
+        for engine in engines:
+            await engine.dispose()
+        password_executor.shutdown(wait=False, cancel_futures=True)
 
 
+app = FastAPI(lifespan=lifespan)
+# Base.metadata.create_all(bind=engine)
 
+for engine in [async_engine, *replica_engines]:
+    instrument_engine(engine)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
 
+app.include_router(departments_router)
+app.include_router(officers_router)
+app.include_router(auth_router)
+app.include_router(internal_router)
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,168 @@
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from cache import caches
+from db.database import async_engine, replica_engines, pool_status
+from ratelimit import rate_limit_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.statuses: dict[int, int] = {}
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    response_bytes: int = 0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+_routes: dict[tuple[str, str], RouteMetrics] = {}
+_db_totals = RequestStats()
+
+
+def instrument_engine(engine: AsyncEngine):
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        _db_totals.queries += 1
+        _db_totals.db_seconds += elapsed
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+def _route_label(scope) -> str:
+    # the router stores the matched route in the scope; its path is the template
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                stats.response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+
+            key = (scope["method"], _route_label(scope))
+            route = _routes.get(key)
+            if route is None:
+                route = _routes[key] = RouteMetrics()
+            route.latency.observe(elapsed)
+            route.queries.observe(stats.queries)
+            route.db_seconds.observe(stats.db_seconds)
+            route.response_bytes.observe(stats.response_bytes)
+            route.statuses[status_code] = route.statuses.get(status_code, 0) + 1
+
+
+def render_metrics() -> str:
+    routes = sorted(_routes.items())
+    lines = []
+    for family, kind, attribute in (
+        ("http_request_duration_seconds", "histogram", "latency"),
+        ("http_request_db_queries", "histogram", "queries"),
+        ("http_request_db_seconds", "histogram", "db_seconds"),
+        ("http_response_size_bytes", "histogram", "response_bytes"),
+    ):
+        lines.append(f"# TYPE {family} {kind}")
+        for (method, path), route in routes:
+            lines += getattr(route, attribute).render(family, f'method="{method}",route="{path}"')
+
+    lines.append("# TYPE http_responses_total counter")
+    for (method, path), route in routes:
+        for status_code, count in sorted(route.statuses.items()):
+            lines.append(
+                f'http_responses_total{{method="{method}",route="{path}",status="{status_code}"}} {count}'
+            )
+
+    lines.append("# TYPE db_queries_total counter")
+    lines.append(f"db_queries_total {_db_totals.queries}")
+    lines.append("# TYPE db_query_seconds_total counter")
+    lines.append(f"db_query_seconds_total {_db_totals.db_seconds}")
+
+    engines = [("primary", async_engine)]
+    engines += [(f"replica{index}", engine) for index, engine in enumerate(replica_engines)]
+    pools = [(name, pool_status(engine)) for name, engine in engines]
+    for stat in pools[0][1]:
+        lines.append(f"# TYPE db_pool_{stat} gauge")
+        for name, status in pools:
+            lines.append(f'db_pool_{stat}{{engine="{name}"}} {status[stat]}')
+
+    for family, attribute in (("cache_hits_total", "hits"), ("cache_misses_total", "misses")):
+        lines.append(f"# TYPE {family} counter")
+        for cache in caches:
+            lines.append(f'{family}{{cache="{cache.name}"}} {getattr(cache, attribute)}')
+
+    lines.append("# TYPE rate_limit_allowed_total counter")
+    lines.append(f"rate_limit_allowed_total {rate_limit_stats['allowed']}")
+    lines.append("# TYPE rate_limit_rejected_total counter")
+    for scope in ("ip", "user"):
+        lines.append(f'rate_limit_rejected_total{{scope="{scope}"}} {rate_limit_stats[f"rejected_{scope}"]}')
+
+    return "\n".join(lines) + "\n"
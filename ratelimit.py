@@ -0,0 +1,90 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from cache import get_redis
+from config import CACHE_URL, RATE_LIMIT_ENABLED, RATE_LIMIT_STORE_SIZE, LOGIN_RATE_IP_CAPACITY, LOGIN_RATE_IP_PER_SECOND, \
+    LOGIN_RATE_USER_CAPACITY, LOGIN_RATE_USER_PER_SECOND
+
+
+class MemoryBucketStore:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisBucketStore:
+    # refill and take atomically, so every worker draws from the same bucket
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return tostring(retry_after)
+    """
+
+    def __init__(self, client):
+        self.script = client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        return float(await self.script(keys=[f"ratelimit:{key}"], args=[capacity, rate, time.time()]))
+
+
+bucket_store = RedisBucketStore(get_redis()) if CACHE_URL else MemoryBucketStore(RATE_LIMIT_STORE_SIZE)
+
+rate_limit_stats = {"allowed": 0, "rejected_ip": 0, "rejected_user": 0}
+
+
+async def limit_login_attempts(
+        request: Request,
+        form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+):
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    client_ip = request.client.host if request.client else ""
+    for scope, key, capacity, rate in (
+        ("ip", client_ip, LOGIN_RATE_IP_CAPACITY, LOGIN_RATE_IP_PER_SECOND),
+        ("user", form_data.username.lower(), LOGIN_RATE_USER_CAPACITY, LOGIN_RATE_USER_PER_SECOND),
+    ):
+        retry_after = await bucket_store.take(f"{request.url.path}:{scope}:{key}", capacity, rate)
+        if retry_after:
+            rate_limit_stats[f"rejected_{scope}"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts.",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    rate_limit_stats["allowed"] += 1
@@ -20,12 +20,29 @@ class DepartmentInfo(BaseModel):
     name: str
 
 class DepartmentsListResponse(BaseModel):
-    total: int
+    total: int | None
     data: list[DepartmentInfo]
+    next_cursor: str | None = None
+
+class DepartmentStats(BaseModel):
+    id: int
+    name: str
+    officer_count: int
+
+class DepartmentsStatsResponse(BaseModel):
+    total_departments: int
+    total_officers: int
+    unassigned_officers: int
+    data: list[DepartmentStats]
 
 class DepartmentDetailResponse(BaseModel):
     id: int
     name: str
 
 class DepartmentDeleteResponse(BaseModel):
-    message: str
\ No newline at end of file
+    message: str
+    affected_officers: int = 0
+
+class DepartmentMergeResponse(BaseModel):
+    message: str
+    moved_officers: int
\ No newline at end of file
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class PoolStatsResponse(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiters: int
+    checkouts: int
+    checkout_wait_total: float
+    checkout_wait_max: float
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from config import BULK_MAX_ITEMS
 
 
 class OfficerCreateRequest(BaseModel):
@@ -16,23 +18,60 @@ class OfficerCreateResponse(BaseModel):
     department_id: int
 
 
+class OfficerCreateJobResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class OfficerJobResponse(BaseModel):
+    job_id: str
+    status: str
+    officer_id: int | None = None
+    error: str | None = None
+
+
+class OfficerBulkCreateRequest(BaseModel):
+    items: list[OfficerCreateRequest] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+    atomic: bool = False
+
+
+class OfficerBulkCreateResult(BaseModel):
+    index: int
+    id: int | None = None
+    error: str | None = None
+
+
+class OfficerBulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[OfficerBulkCreateResult]
+
+
 class OfficerInfo(BaseModel):
     id: int
     first_name: str
     last_name: str
     email: str
-    department_id: int
+    department_id: int | None
 
 class OfficersListResponse(BaseModel):
-    total: int
+    total: int | None
     data: list[OfficerInfo]
+    next_cursor: str | None = None
+
+class OfficerSearchResult(OfficerInfo):
+    score: float
+
+class OfficersSearchResponse(BaseModel):
+    total: int
+    data: list[OfficerSearchResult]
 
 class OfficerDetailResponse(BaseModel):
     id: int
     first_name: str
     last_name: str
     email: str
-    department_id: int
+    department_id: int | None
 
 
 class OfficerUpdateRequest(BaseModel):
@@ -41,12 +80,29 @@ class OfficerUpdateRequest(BaseModel):
     email: str | None = None
     department_id: int | None = None
 
+class OfficerBulkUpdateItem(OfficerUpdateRequest):
+    id: int
+
+class OfficerTransferRequest(BaseModel):
+    from_department_id: int
+    to_department_id: int
+    officer_ids: list[int] | None = Field(default=None, max_length=BULK_MAX_ITEMS)
+
+class OfficerBulkUpdateRequest(BaseModel):
+    updates: list[OfficerBulkUpdateItem] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    transfer: OfficerTransferRequest | None = None
+
+class OfficerBulkUpdateResponse(BaseModel):
+    updated: int
+    transferred: int
+    not_found: list[int]
+
 class OfficerUpdateResponse(BaseModel):
     id: int
     first_name: str
     last_name: str
     email: str
-    department_id: int
+    department_id: int | None
 
 
 class OfficerDeleteResponse(BaseModel):
@@ -0,0 +1,131 @@
+import argparse
+import math
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+from hashing import calibrate_bcrypt_rounds
+
+# Workers import config.py themselves and inherit os.environ, so the per-worker
+# settings below are exported before they start. Keep this module free of
+# imports from the app: it would build engines in the supervisor process.
+load_dotenv()
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and a cgroup v2 CPU quota."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def default_workers(connection_budget: int) -> int:
+    # Caches, ETag versions, rate limits, idempotency keys and job statuses are
+    # per process unless CACHE_URL shares them, so only then run several workers.
+    if not os.environ.get("CACHE_URL"):
+        return 1
+    return max(1, min(available_cpus(), connection_budget))
+
+
+def worker_settings(workers: int, connection_budget: int) -> dict[str, str]:
+    """Split a per-database connection budget and the CPU cores across worker processes."""
+    per_worker = connection_budget // workers
+    if per_worker < 1:
+        raise SystemExit(f"DB_CONNECTION_BUDGET={connection_budget} cannot give {workers} workers a connection each")
+
+    pool_size = min(int(os.environ.get("DB_POOL_SIZE", 5)), per_worker)
+    settings = {
+        "WEB_CONCURRENCY": str(workers),
+        "DB_POOL_SIZE": str(pool_size),
+        "DB_MAX_OVERFLOW": str(per_worker - pool_size),
+        "DB_POOL_MIN_SIZE": str(min(int(os.environ.get("DB_POOL_MIN_SIZE", pool_size)), pool_size)),
+    }
+    if not os.environ.get("PASSWORD_HASH_WORKERS"):
+        settings["PASSWORD_HASH_WORKERS"] = str(max(1, available_cpus() // workers))
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python serve.py")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ["WEB_CONCURRENCY"]) if os.environ.get("WEB_CONCURRENCY") else None,
+        help="defaults to the available CPUs when CACHE_URL is set, otherwise 1"
+    )
+    parser.add_argument(
+        "--connection-budget",
+        type=int,
+        default=int(os.environ.get("DB_CONNECTION_BUDGET", 50)),
+        help="connections all workers together may open to each database"
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=int(os.environ.get("WEB_MAX_REQUESTS", 10000)),
+        help="restart a worker after this many requests, 0 to never restart"
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 1000)),
+        help="add up to this many requests to each worker's limit, so workers do not restart together"
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30)),
+        help="seconds to let in-flight requests finish on SIGTERM"
+    )
+    parser.add_argument(
+        "--forwarded-allow-ips",
+        default=os.environ.get("FORWARDED_ALLOW_IPS"),
+        help="comma-separated proxy addresses whose X-Forwarded-For is trusted (uvicorn default: 127.0.0.1)"
+    )
+    args = parser.parse_args()
+
+    if args.workers is None:
+        args.workers = default_workers(args.connection_budget)
+    elif args.workers > 1 and not os.environ.get("CACHE_URL"):
+        parser.error("more than one worker needs CACHE_URL, so workers share caches, versions and rate limits")
+
+    settings = worker_settings(args.workers, args.connection_budget)
+    # Calibrated once here: min and max rounds are pinned to the cost, so workers
+    # with different costs would rehash each other's passwords on every login.
+    if os.environ.get("BCRYPT_TARGET_MS"):
+        rounds, elapsed_ms = calibrate_bcrypt_rounds(float(os.environ["BCRYPT_TARGET_MS"]))
+        settings["BCRYPT_ROUNDS"] = str(rounds)
+        print(f"bcrypt rounds {rounds} ({elapsed_ms:.0f} ms per hash)", flush=True)
+    os.environ.update(settings)
+    print(
+        f"{args.workers} workers, per worker: pool {settings['DB_POOL_SIZE']} "
+        f"+ overflow {settings['DB_MAX_OVERFLOW']} connections",
+        flush=True
+    )
+
+    # on SIGTERM each worker stops accepting, drains and runs the lifespan
+    # shutdown, which disposes the engines
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        # a single worker runs without a supervisor, so hitting the limit would stop the server
+        limit_max_requests=(args.max_requests or None) if args.workers > 1 else None,
+        limit_max_requests_jitter=args.max_requests_jitter,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        timeout_graceful_shutdown=args.graceful_timeout
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import asyncio
+
+from cache import Cache, MemoryBackend
+
+
+def test_get_returns_set_value_and_counts_hits():
+    cache = Cache("test:values", 10, 60)
+
+    async def run():
+        assert await cache.get("a") is None
+        await cache.set("a", {"id": 1})
+        assert await cache.get("a") == {"id": 1}
+
+    asyncio.run(run())
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_values_are_misses(monkeypatch):
+    backend = MemoryBackend(10)
+    now = [100.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+
+    async def run():
+        await backend.set("a", 1, ttl=5)
+        now[0] += 4
+        assert await backend.get("a") == 1
+        now[0] += 2
+        assert await backend.get("a") is None
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_value_is_evicted():
+    backend = MemoryBackend(2)
+
+    async def run():
+        await backend.set("a", 1, ttl=60)
+        await backend.set("b", 2, ttl=60)
+        await backend.get("a")
+        await backend.set("c", 3, ttl=60)
+        return [await backend.get(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == [1, None, 3]
+
+
+def test_add_only_sets_absent_keys():
+    cache = Cache("test:add", 10, 60)
+
+    async def run():
+        assert await cache.add("a", 1)
+        assert not await cache.add("a", 2)
+        await cache.delete("a")
+        assert await cache.add("a", 3)
+        return await cache.get("a")
+
+    assert asyncio.run(run()) == 3
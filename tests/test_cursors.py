@@ -0,0 +1,19 @@
+import pytest
+from fastapi import HTTPException
+
+from utils import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(7, 1234), 2) == [7, 1234]
+
+
+def test_cursor_keeps_null_department():
+    assert decode_cursor(encode_cursor(None, 5), 2) == [None, 5]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(1), encode_cursor(1, 2, 3), "WyJhIiwxXQ"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 2)
+    assert error.value.status_code == 400
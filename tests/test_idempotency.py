@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from idempotency import IdempotencyMiddleware
+
+PATH = "/departments/create/"
+
+
+def make_app(delay: float = 0.0, statuses: list[int] | None = None):
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware)
+    app.state.calls = 0
+
+    @app.post(PATH)
+    async def create(request: Request):
+        app.state.calls += 1
+        await asyncio.sleep(delay)
+        status_code = statuses.pop(0) if statuses else 200
+        return JSONResponse({"call": app.state.calls, "body": await request.json()}, status_code=status_code)
+
+    return app
+
+
+def client(app, host: str = "10.0.0.1") -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(host, 1234))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+def post(http: httpx.AsyncClient, key: str, body: dict, **headers):
+    return http.post(PATH, json=body, headers={"Idempotency-Key": key, **headers})
+
+
+def test_retry_replays_the_first_response():
+    app = make_app()
+    key = uuid.uuid4().hex
+
+    async def run():
+        async with client(app) as http:
+            return await post(http, key, {"name": "a"}), await post(http, key, {"name": "a"})
+
+    first, retry = asyncio.run(run())
+    assert app.state.calls == 1
+    assert retry.status_code == first.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_key_reused_with_another_body_is_rejected():
+    app = make_app()
+    key = uuid.uuid4().hex
+
+    async def run():
+        async with client(app) as http:
+            await post(http, key, {"name": "a"})
+            return await post(http, key, {"name": "b"})
+
+    assert asyncio.run(run()).status_code == 422
+    assert app.state.calls == 1
+
+
+def test_concurrent_duplicate_waits_for_the_first_request():
+    app = make_app(delay=0.1)
+    key = uuid.uuid4().hex
+
+    async def run():
+        async with client(app) as http:
+            return await asyncio.gather(post(http, key, {"name": "a"}), post(http, key, {"name": "a"}))
+
+    first, second = asyncio.run(run())
+    assert app.state.calls == 1
+    assert first.json() == second.json()
+
+
+def test_server_errors_are_not_replayed():
+    app = make_app(statuses=[500, 200])
+    key = uuid.uuid4().hex
+
+    async def run():
+        async with client(app) as http:
+            return await post(http, key, {"name": "a"}), await post(http, key, {"name": "a"})
+
+    first, retry = asyncio.run(run())
+    assert (first.status_code, retry.status_code) == (500, 200)
+    assert app.state.calls == 2
+
+
+def test_rate_limited_responses_are_not_replayed():
+    app = make_app(statuses=[429, 200])
+    key = uuid.uuid4().hex
+
+    async def run():
+        async with client(app) as http:
+            return await post(http, key, {"name": "a"}), await post(http, key, {"name": "a"})
+
+    first, retry = asyncio.run(run())
+    assert (first.status_code, retry.status_code) == (429, 200)
+    assert "idempotent-replayed" not in retry.headers
+    assert app.state.calls == 2
+
+
+def test_keys_are_scoped_by_credentials_or_client():
+    app = make_app()
+    key = uuid.uuid4().hex
+
+    async def run():
+        async with client(app, "10.0.0.1") as one, client(app, "10.0.0.2") as other:
+            await post(one, key, {"name": "a"})
+            await post(other, key, {"name": "a"})
+            await post(one, key, {"name": "a"}, Authorization="Bearer x")
+            await post(other, key, {"name": "a"}, Authorization="Bearer x")
+
+    asyncio.run(run())
+    # one run per client address without credentials, one shared by the same token
+    assert app.state.calls == 3
+
+
+def test_requests_without_a_key_are_not_deduplicated():
+    app = make_app()
+
+    async def run():
+        async with client(app) as http:
+            for _ in range(2):
+                await http.post(PATH, json={"name": "a"})
+
+    asyncio.run(run())
+    assert app.state.calls == 2
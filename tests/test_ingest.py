@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import ingest
+from ingest import OfficerIngestQueue, job_cache
+
+OFFICER = {"first_name": "A", "last_name": "B", "email": "a@example.com", "department_id": 1}
+
+
+async def wait_for_status(job_id: str, status: str):
+    for _ in range(100):
+        job = await job_cache.get(job_id)
+        if job and job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def test_failed_insert_marks_jobs_failed_and_keeps_running(monkeypatch):
+    queue = OfficerIngestQueue(10, 10, 0.01)
+    outcomes = [RuntimeError("database down"), [{"status": "created", "officer_id": 7}]]
+
+    async def insert(batch):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(queue, "_insert", insert)
+    monkeypatch.setattr(ingest, "bump", lambda *tables: asyncio.sleep(0))
+
+    async def run():
+        queue.start()
+        failed = await wait_for_status(await queue.submit(OFFICER), "failed")
+        created = await wait_for_status(await queue.submit(OFFICER), "created")
+        await queue.stop(1)
+        return failed, created
+
+    failed, created = asyncio.run(run())
+    assert failed["error"] == "Database error"
+    assert created["officer_id"] == 7
+
+
+def test_failing_status_write_does_not_stop_the_loop(monkeypatch):
+    queue = OfficerIngestQueue(10, 10, 0.01)
+    flushes = []
+    cache_set = job_cache.set
+
+    async def insert(batch):
+        flushes.append(len(batch))
+        return [{"status": "failed", "error": "Department not found"}] * len(batch)
+
+    async def flaky_set(key, value, ttl=None):
+        # the first flush's status write fails
+        if len(flushes) == 1 and value["status"] != "queued":
+            raise ConnectionError("cache down")
+        await cache_set(key, value, ttl)
+
+    monkeypatch.setattr(queue, "_insert", insert)
+    monkeypatch.setattr(job_cache, "set", flaky_set)
+
+    async def run():
+        queue.start()
+        await queue.submit(OFFICER)
+        await asyncio.sleep(0.05)
+        job = await wait_for_status(await queue.submit(OFFICER), "failed")
+        await queue.stop(1)
+        return job
+
+    assert asyncio.run(run())["error"] == "Department not found"
+    assert flushes == [1, 1]
+
+
+def test_stop_gives_up_after_the_timeout(monkeypatch):
+    queue = OfficerIngestQueue(10, 10, 0.01)
+
+    async def insert(batch):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(queue, "_insert", insert)
+
+    async def run():
+        queue.start()
+        await queue.submit(OFFICER)
+        await asyncio.sleep(0.02)
+        await asyncio.wait_for(queue.stop(0.05), 1)
+
+    asyncio.run(run())
+
+
+def test_full_queue_rejects_with_503():
+    queue = OfficerIngestQueue(1, 10, 0.01)
+
+    async def run():
+        await queue.submit(OFFICER)
+        await queue.submit(OFFICER)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 503
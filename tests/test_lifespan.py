@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import main
+from db import database
+
+
+class Engine:
+    async def dispose(self):
+        pass
+
+
+def start(monkeypatch, primary: Engine, replicas: list[Engine], unreachable: set[Engine]):
+    async def warm_engine(engine, connections):
+        if engine in unreachable:
+            raise ConnectionRefusedError("unreachable")
+
+    monkeypatch.setattr(main, "async_engine", primary)
+    monkeypatch.setattr(main, "replica_engines", replicas)
+    monkeypatch.setattr(main, "warm_engine", warm_engine)
+    monkeypatch.setattr(main, "password_executor", ThreadPoolExecutor(1))
+    monkeypatch.setattr(database, "_replica_down_until", [0.0] * len(replicas))
+
+    async def run():
+        async with main.lifespan(main.app):
+            pass
+
+    asyncio.run(run())
+
+
+def test_unreachable_replica_is_marked_down_without_failing_startup(monkeypatch):
+    primary, replica = Engine(), Engine()
+    start(monkeypatch, primary, [replica], {replica})
+    assert database._replica_down_until[0] > 0
+
+
+def test_unreachable_primary_fails_startup(monkeypatch):
+    primary = Engine()
+    with pytest.raises(ConnectionRefusedError):
+        start(monkeypatch, primary, [], {primary})
@@ -0,0 +1,38 @@
+import asyncio
+
+from ratelimit import MemoryBucketStore
+
+
+def test_bucket_allows_capacity_then_refills(monkeypatch):
+    store = MemoryBucketStore(10)
+    now = [100.0]
+    monkeypatch.setattr("ratelimit.time.monotonic", lambda: now[0])
+
+    async def run():
+        results = [await store.take("ip:1", capacity=2, rate=1) for _ in range(3)]
+        now[0] += 1
+        results.append(await store.take("ip:1", capacity=2, rate=1))
+        return results
+
+    assert asyncio.run(run()) == [0.0, 0.0, 1.0, 0.0]
+
+
+def test_buckets_are_independent_per_key():
+    store = MemoryBucketStore(10)
+
+    async def run():
+        await store.take("user:a", capacity=1, rate=0.1)
+        return await store.take("user:b", capacity=1, rate=0.1)
+
+    assert asyncio.run(run()) == 0.0
+
+
+def test_store_is_bounded():
+    store = MemoryBucketStore(2)
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await store.take(key, capacity=1, rate=1)
+
+    asyncio.run(run())
+    assert list(store._buckets) == ["b", "c"]
@@ -1,26 +1,156 @@
+import asyncio
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, UTC, timedelta
+from enum import Enum
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, Request, status
+import orjson
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import Select, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
-from db.database import get_session
+from cache import Cache
+from config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY, AUTH_CACHE_SIZE, AUTH_CACHE_TTL, \
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT, COUNT_CACHE_SIZE, COUNT_CACHE_TTL, BCRYPT_ROUNDS
+from db.database import get_read_session
 from db.models import User
+from versions import current, may_lag
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token/")
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+# ids of users known to exist, so protected reads skip the users lookup
+user_cache = Cache("auth:user", AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+count_cache = Cache("counts", COUNT_CACHE_SIZE, COUNT_CACHE_TTL)
+
+# bcrypt releases the GIL, so a thread pool spreads hashing across cores
+# while keeping it off the event loop.
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_jobs = 0
+
+
+async def _run_password_job(func, *args):
+    global _password_jobs
+    if _password_jobs >= PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many pending password operations",
+            headers={"Retry-After": "1"}
+        )
+
+    _password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        _password_jobs -= 1
+
+
+def configure_bcrypt_rounds(rounds: int):
+    # pinning min and max to the cost makes needs_update flag hashes made with any other cost
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+
+configure_bcrypt_rounds(BCRYPT_ROUNDS)
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_job(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def json_response(payload, status_code: int = 200, headers: dict[str, str] | None = None) -> Response:
+    # serialized with orjson; FastAPI's ORJSONResponse is deprecated and warns on every instance
+    return Response(orjson.dumps(payload), status_code=status_code, headers=headers, media_type="application/json")
+
+
+def encode_cursor(*values: int | None) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[int | None]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(value is None or isinstance(value, int) for value in values)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+class CountMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    none = "none"
+
+
+async def estimate_rows(session: AsyncSession, table: str, query: Select) -> int:
+    if query.whereclause is None:
+        # planner statistics; -1 means the table was never analyzed
+        estimate = (
+            await session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": table}
+            )
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+
+    compiled = query.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = (
+        await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(
+        session: AsyncSession,
+        table: str,
+        query: Select,
+        mode: CountMode,
+        cache_key: str
+) -> int | None:
+    if mode == CountMode.none:
+        return None
+    if mode == CountMode.estimated:
+        return await estimate_rows(session, table, query)
+
+    version, modified = await current(table)
+    key = f"{table}:{version}:{cache_key}"
+    total = await count_cache.get(key)
+    if total is None:
+        total = (
+            await session.execute(select(func.count()).select_from(query.subquery()))
+        ).scalar()
+        if not may_lag(modified):
+            await count_cache.set(key, total)
+    return total
 
 
 def create_access_token(user_id: int):
@@ -40,7 +170,7 @@ def decode_access_token(token):
 async def logged_in(
         request: Request,
         token: Annotated[str, Depends(oauth2_scheme)],
-        session: Annotated[AsyncSession, Depends(get_session)]
+        session: Annotated[AsyncSession, Depends(get_read_session)]
 ):
     try:
         user_id = decode_access_token(token)
@@ -55,6 +185,9 @@ async def logged_in(
             detail=f"Invalid token: {e}"
         )
 
+    if await user_cache.get(user_id):
+        return request
+
     db_user: User = (
         await session.execute(
             select(User).filter(User.id == user_id)
@@ -67,4 +200,5 @@ async def logged_in(
             detail="User not found"
         )
 
+    await user_cache.set(user_id, True)
     return request
@@ -0,0 +1,72 @@
+import time
+import uuid
+from email.utils import formatdate
+
+from fastapi import Request
+
+from cache import get_redis
+from config import CACHE_URL, DB_REPLICA_URIS, READ_YOUR_WRITES_SECONDS, WEB_CONCURRENCY
+
+# In-process counters restart at zero, so their tags carry a per-process id
+# and one worker never answers 304 for a tag issued by another.
+_instance = uuid.uuid4().hex[:8]
+_started = time.time()
+_versions: dict[str, int] = {}
+_modified: dict[str, float] = {}
+
+# In-process counters only move in the worker that handled the write, so with
+# several workers another one would keep answering 304 for changed data.
+ETAGS_ENABLED = bool(CACHE_URL) or WEB_CONCURRENCY <= 1
+
+
+async def bump(*tables: str):
+    now = time.time()
+    for table in tables:
+        if CACHE_URL:
+            async with get_redis().pipeline() as pipe:
+                await pipe.incr(f"version:{table}").set(f"modified:{table}", now).execute()
+        else:
+            _versions[table] = _versions.get(table, 0) + 1
+            _modified[table] = now
+
+
+async def current(table: str) -> tuple[str, float]:
+    if CACHE_URL:
+        version, modified = await get_redis().mget(f"version:{table}", f"modified:{table}")
+        return f"s{int(version or 0)}", float(modified or _started)
+    return f"{_instance}.{_versions.get(table, 0)}", _modified.get(table, _started)
+
+
+def may_lag(modified: float) -> bool:
+    # Replicas may not have caught up with a recent write yet; anything derived
+    # from a read now must not be tagged or cached under the new version.
+    return bool(DB_REPLICA_URIS) and time.time() - modified < READ_YOUR_WRITES_SECONDS
+
+
+async def get_validators(*tables: str) -> dict[str, str]:
+    if not ETAGS_ENABLED:
+        return {}
+
+    versions = []
+    last_modified = _started
+    for table in tables:
+        version, modified = await current(table)
+        versions.append(f"{table}.{version}")
+        last_modified = max(last_modified, modified)
+
+    if may_lag(last_modified):
+        return {}
+
+    return {
+        "ETag": f'W/"{"-".join(versions)}"',
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+    }
+
+
+def is_not_modified(request: Request, validators: dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match or not validators:
+        return False
+    etag = validators["ETag"].removeprefix("W/")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from api.officers import OFFICER_COLUMNS
+from db.models import Department, Officer, User
+
+
+def hot_statements() -> list:
+    # Same shapes as the router queries, so they share SQLAlchemy's compiled
+    # cache entries and asyncpg's per-connection prepared statements.
+    return [
+        select(User).filter(User.id == 0),
+        select(User).filter(User.email == ""),
+        select(Department.id, Department.name).filter(Department.id == 0),
+        select(Department.id, Department.name).order_by(Department.id).limit(1),
+        select(func.count()).select_from(select(Department.id).subquery()),
+        select(*OFFICER_COLUMNS).filter(Officer.id == 0),
+        select(*OFFICER_COLUMNS).order_by(Officer.department_id, Officer.id).limit(1),
+        select(*OFFICER_COLUMNS)
+        .filter(Officer.department_id == 0)
+        .order_by(Officer.department_id, Officer.id)
+        .limit(1),
+        select(func.count()).select_from(select(*OFFICER_COLUMNS).subquery()),
+    ]
+
+
+async def warm_engine(engine: AsyncEngine, connections: int):
+    """Open `connections` pooled connections at once and prepare the hot statements on each."""
+    if connections <= 0:
+        return
+
+    async with AsyncExitStack() as stack:
+        # held open together, so the pool has to create every one of them
+        conns = [await stack.enter_async_context(engine.connect()) for _ in range(connections)]
+
+        async def prepare(conn):
+            async with AsyncSession(bind=conn) as session:
+                await session.execute(text("SELECT 1"))
+                for statement in hot_statements():
+                    await session.execute(statement)
+                await session.rollback()
+
+        await asyncio.gather(*(prepare(conn) for conn in conns))